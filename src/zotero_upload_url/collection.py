@@ -16,14 +16,31 @@ Usage:
     zotero-collection --create NAME --parent KEY  # Create subcollection
 """
 
+from __future__ import annotations
+
 import argparse
+import functools
 import json
-import shutil
-import subprocess
+import os
 import sys
-from typing import Any
-
-import requests
+import threading
+import time
+from collections import defaultdict
+from operator import attrgetter
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, NamedTuple
+
+# Heavier modules (http.client, subprocess, concurrent.futures, ...) are
+# imported where they are used so --help and fast-failing paths don't pay for them
+if TYPE_CHECKING:
+    from concurrent.futures import ThreadPoolExecutor
+
+# Optional: faster JSON serialization for large listings
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
 
 DEFAULT_ZOTERO_PORT = 23119
 
@@ -33,15 +50,133 @@ PLUGIN_BASE_PATH = "/export-org"
 # Native API base path (for listing)
 NATIVE_BASE_PATH = "/api"
 
+# Native API page size (the API's maximum "limit")
+PAGE_SIZE = 100
+
+# How long a cached collection listing is considered fresh
+CACHE_TTL_SECONDS = 60
+
+# Bump when the on-disk cache layout changes; old files are then ignored
+CACHE_FORMAT_VERSION = 2
+
+# In-process cache of list_collections results: port -> (expiry, data),
+# expiry measured on time.monotonic()
+_MEMO: dict[int, tuple[float, dict]] = {}
+
+# Concurrent listing requests. Zotero's local server only speaks HTTP/1.1, so
+# requests can't be multiplexed on one connection; instead every worker
+# thread keeps its own keep-alive connection (see _get_client).
+_MAX_WORKERS = 16
+
+# Per-thread keep-alive clients, keyed by port
+_CLIENTS = threading.local()
+
 
-def get_plugin_url(port: int, endpoint: str) -> str:
-    """Get URL for plugin API endpoints (selection, creation)."""
-    return f"http://127.0.0.1:{port}{PLUGIN_BASE_PATH}{endpoint}"
+class _HTTPError(Exception):
+    """Zotero answered a request with an HTTP error status."""
 
 
-def get_native_url(port: int, endpoint: str) -> str:
-    """Get URL for native Zotero API endpoints (listing)."""
-    return f"http://127.0.0.1:{port}{NATIVE_BASE_PATH}{endpoint}"
+class _Response(NamedTuple):
+    """Status, headers and body of a Zotero response."""
+
+    status: int
+    headers: Any  # http.client.HTTPMessage; .get() is case-insensitive
+    content: bytes
+
+
+class _HttpClient:
+    """Minimal HTTP/1.1 client holding one keep-alive connection to Zotero.
+
+    Zotero's local endpoints are plain HTTP on 127.0.0.1 with no redirects or
+    auth, so http.client is all that's needed. A connection can only serve
+    one request at a time, so clients must not be shared between threads.
+    """
+
+    def __init__(self, port: int):
+        import http.client
+
+        self.port = port
+        self._conn = http.client.HTTPConnection("127.0.0.1", port)
+
+    def request(
+        self,
+        method: str,
+        path: str,
+        body: bytes | None = None,
+        headers: dict[str, str] | None = None,
+        timeout: float = 10,
+    ) -> _Response:
+        """Send a request and read the whole response.
+
+        Raises OSError if Zotero can't be reached and _HTTPError for 4xx/5xx
+        responses. A GET on a keep-alive connection Zotero has since closed
+        is retried once on a fresh connection.
+        """
+        import http.client
+
+        url = f"http://127.0.0.1:{self.port}{path}"
+        conn = self._conn
+        for attempt in range(2):
+            reused = conn.sock is not None
+            conn.timeout = timeout
+            if reused:
+                conn.sock.settimeout(timeout)
+            try:
+                conn.request(method, path, body=body, headers=headers or {})
+                r = conn.getresponse()
+                content = r.read()
+                break
+            except (OSError, http.client.HTTPException) as e:
+                conn.close()
+                if reused and method == "GET" and attempt == 0 and isinstance(e, ConnectionError):
+                    continue
+                if isinstance(e, OSError):
+                    raise
+                raise ConnectionError(f"{e} for url: {url}") from e
+
+        if r.status >= 400:
+            raise _HTTPError(f"{r.status} {r.reason} for url: {url}")
+        return _Response(r.status, r.headers, content)
+
+
+def _get_client(port: int) -> _HttpClient:
+    """Get the calling thread's keep-alive client for a Zotero port."""
+    clients = getattr(_CLIENTS, "by_port", None)
+    if clients is None:
+        clients = _CLIENTS.by_port = {}
+    client = clients.get(port)
+    if client is None:
+        client = clients[port] = _HttpClient(port)
+    return client
+
+
+def _post_plugin(port: int, endpoint: str, payload: dict[str, Any]) -> _Response:
+    """POST a JSON payload to a plugin API endpoint."""
+    return _get_client(port).request(
+        "POST",
+        f"{PLUGIN_BASE_PATH}{endpoint}",
+        body=json.dumps(payload).encode(),
+        headers={"Content-Type": "application/json"},
+        timeout=5,
+    )
+
+
+def _loads(data: bytes) -> Any:
+    """Parse JSON from raw bytes, using orjson when available."""
+    if ORJSON_AVAILABLE:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def _dumps(obj: Any) -> bytes:
+    """Serialize obj as indented UTF-8 JSON bytes, using orjson when available.
+
+    Non-ASCII text is written as-is rather than \\u-escaped, matching orjson,
+    so output doesn't depend on whether orjson is installed.
+    """
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2)
+    return json.dumps(obj, indent=2, ensure_ascii=False).encode()
 
 
 def get_current_collection(port: int) -> dict | None:
@@ -50,123 +185,438 @@ def get_current_collection(port: int) -> dict | None:
     Uses plugin API (requires zotero-export-notes plugin).
     """
     try:
-        r = requests.get(get_plugin_url(port, "/collection/current"), timeout=5)
-        r.raise_for_status()
-        return r.json()
-    except requests.exceptions.ConnectionError:
+        r = _get_client(port).request("GET", f"{PLUGIN_BASE_PATH}/collection/current", timeout=5)
+        return _loads(r.content)
+    except OSError:
         print(f"Error: Cannot connect to Zotero on port {port}", file=sys.stderr)
         return None
-    except requests.exceptions.HTTPError as e:
+    except _HTTPError as e:
         print(f"Error: {e}", file=sys.stderr)
         return None
 
 
-def _build_collection_tree(collections: list[dict[str, Any]]) -> list[dict[str, Any]]:
+class CollectionNode(NamedTuple):
+    """A collection and its subcollections in a library tree."""
+
+    key: str
+    name: str
+    parent_key: str | None
+    children: list["CollectionNode"]
+    sort_key: str  # name.lower(), computed once for sorting and matching
+
+
+_SORT_KEY = attrgetter("sort_key")
+
+
+def _build_collection_tree(collections: list[dict[str, Any]]) -> list[CollectionNode]:
     """Build hierarchical tree from flat collection list.
 
     Takes flat list from native API and builds nested tree structure.
     """
-    # Create lookup by key
-    by_key: dict[str, dict[str, Any]] = {}
+    # Single pass: each node's children list is the bucket for its key,
+    # so attaching a child is just an append to its parent's bucket.
+    by_key: dict[str, CollectionNode] = {}
+    children_by_parent: defaultdict[str | None, list[CollectionNode]] = defaultdict(list)
     for c in collections:
         data = c.get("data", {})
         key = c.get("key", "")
-        by_key[key] = {
-            "key": key,
-            "name": data.get("name", "Unknown"),
-            "parentKey": data.get("parentCollection") or None,
-            "children": []
-        }
+        parent_key = data.get("parentCollection") or None
+        name = data.get("name", "Unknown")
+        node = CollectionNode(key, name, parent_key, children_by_parent[key], name.lower())
+        by_key[key] = node
+        children_by_parent[parent_key].append(node)
+
+    # Top-level collections plus any whose parent isn't in this library
+    roots: list[CollectionNode] = []
+    for parent_key, children in children_by_parent.items():
+        if parent_key is None or parent_key not in by_key:
+            roots.extend(children)
+
+    # Sort children alphabetically (iteratively, deep trees can't overflow)
+    stack = [roots]
+    while stack:
+        nodes = stack.pop()
+        nodes.sort(key=_SORT_KEY)
+        stack.extend(node.children for node in nodes if node.children)
 
-    # Build tree
-    roots: list[dict[str, Any]] = []
-    for key, node in by_key.items():
-        parent_key = node["parentKey"]
-        if parent_key and parent_key in by_key:
-            by_key[parent_key]["children"].append(node)
-        else:
-            roots.append(node)
-
-    # Sort children alphabetically
-    def sort_children(nodes: list[dict[str, Any]]) -> None:
-        nodes.sort(key=lambda x: x["name"].lower())
-        for node in nodes:
-            if node["children"]:
-                sort_children(node["children"])
-
-    sort_children(roots)
     return roots
 
 
-def list_collections_native(port: int) -> dict | None:
+def _libraries_to_json(data: dict) -> dict:
+    """Convert library data with CollectionNode trees to plain JSON-able dicts."""
+    libraries = []
+    for lib in data.get("libraries", []):
+        collections: list[dict[str, Any]] = []
+        stack = [(lib.get("collections") or [], collections)]
+        while stack:
+            nodes, out = stack.pop()
+            for node in nodes:
+                children: list[dict[str, Any]] = []
+                out.append({
+                    "key": node.key,
+                    "name": node.name,
+                    "parentKey": node.parent_key,
+                    "children": children
+                })
+                if node.children:
+                    stack.append((node.children, children))
+        libraries.append({**lib, "collections": collections})
+    return {"libraries": libraries}
+
+
+def _libraries_from_json(data: dict) -> dict:
+    """Rebuild CollectionNode trees from the plain dict form."""
+    libraries = []
+    for lib in data.get("libraries", []):
+        collections: list[CollectionNode] = []
+        stack = [(lib.get("collections") or [], collections)]
+        while stack:
+            nodes, out = stack.pop()
+            for node in nodes:
+                children: list[CollectionNode] = []
+                name = node["name"]
+                out.append(CollectionNode(node["key"], name, node.get("parentKey"), children, name.lower()))
+                if node.get("children"):
+                    stack.append((node["children"], children))
+        libraries.append({**lib, "collections": collections})
+    return {"libraries": libraries}
+
+
+def _get_native(port: int, endpoint: str, headers: dict[str, str] | None = None) -> _Response:
+    """GET a native API endpoint, raising _HTTPError on failure."""
+    return _get_client(port).request("GET", f"{NATIVE_BASE_PATH}{endpoint}", headers=headers, timeout=10)
+
+
+def _get_native_listings(
+    port: int,
+    endpoints: list[str],
+    executor: ThreadPoolExecutor,
+    versions: dict[str, str] | None = None,
+) -> list[tuple[list[bytes] | None, str | None] | Exception]:
+    """GET every page of each native API listing endpoint concurrently.
+
+    The first page of each endpoint reports Total-Results; the remaining
+    pages are then requested in parallel. Without Total-Results, pages are
+    requested one after another until a short page comes back. If versions has a known
+    Last-Modified-Version for an endpoint, it is sent as
+    If-Modified-Since-Version and a 304 skips the listing entirely.
+
+    Returns, per endpoint, either (page bodies, version) -- with page bodies
+    None when not modified -- or the exception that stopped the fetch.
+    """
+    from concurrent.futures import Future
+
+    versions = versions or {}
+
+    def page(endpoint: str, start: int) -> bytes:
+        return _get_native(port, f"{endpoint}?limit={PAGE_SIZE}&start={start}").content
+
+    def pages_after(endpoint: str, body: bytes) -> list[bytes]:
+        pages: list[bytes] = []
+        start = 0
+        while len(_loads(body)) >= PAGE_SIZE:
+            start += PAGE_SIZE
+            body = page(endpoint, start)
+            pages.append(body)
+        return pages
+
+    def first_page(endpoint: str) -> tuple[bytes | None, int | None, str | None]:
+        known_version = versions.get(endpoint)
+        headers = {"If-Modified-Since-Version": known_version} if known_version else None
+        r = _get_native(port, f"{endpoint}?limit={PAGE_SIZE}&start=0", headers=headers)
+        version = r.headers.get("Last-Modified-Version")
+        if r.status == 304:
+            return None, 0, version or known_version
+        total = r.headers.get("Total-Results")
+        return r.content, int(total) if total is not None else None, version
+
+    first_futures = [executor.submit(first_page, endpoint) for endpoint in endpoints]
+
+    pending: list[tuple[bytes | None, list | Future, str | None] | Exception] = []
+    for endpoint, future in zip(endpoints, first_futures):
+        try:
+            body, total, version = future.result()
+        except (OSError, _HTTPError) as e:
+            pending.append(e)
+            continue
+        if body is None:
+            rest: list | Future = []
+        elif total is None:
+            rest = executor.submit(pages_after, endpoint, body)
+        else:
+            rest = [executor.submit(page, endpoint, start) for start in range(PAGE_SIZE, total, PAGE_SIZE)]
+        pending.append((body, rest, version))
+
+    results: list[tuple[list[bytes] | None, str | None] | Exception] = []
+    for entry in pending:
+        if isinstance(entry, Exception):
+            results.append(entry)
+            continue
+        body, rest, version = entry
+        if body is None:
+            results.append((None, version))
+            continue
+        try:
+            more = rest.result() if isinstance(rest, Future) else [f.result() for f in rest]
+            results.append(([body] + more, version))
+        except (OSError, _HTTPError) as e:
+            results.append(e)
+    return results
+
+
+def _parse_pages(pages: list[bytes]) -> list[Any]:
+    """Parse and concatenate paged JSON array bodies."""
+    return [item for body in pages for item in _loads(body)]
+
+
+def _join_pages(pages: list[bytes]) -> bytes:
+    """Concatenate paged JSON array bodies into one array without parsing them."""
+    if len(pages) == 1:
+        return pages[0]
+    parts = [body.strip()[1:-1].strip() for body in pages]
+    return b"[" + b", ".join(part for part in parts if part) + b"]"
+
+
+def _group_name(group: dict[str, Any]) -> str:
+    """Get display name of a group from the native API group object."""
+    group_id = group.get("id")
+    return group.get("data", {}).get("name") or group.get("name", f"Group {group_id}")
+
+
+def list_collections_native(port: int, cached: dict | None = None) -> dict | None:
     """Get hierarchical list of all libraries and collections using native API.
 
-    Uses Zotero's native API (no plugin required).
+    Uses Zotero's native API (no plugin required). Listings are fetched in
+    pages of PAGE_SIZE; pages and group collection requests are issued
+    concurrently, each worker thread keeping its own keep-alive connection,
+    so latency doesn't grow with the number of groups or the size of the
+    library.
+
+    If cached is a previous result (including its "versions"), listings are
+    revalidated with If-Modified-Since-Version and unchanged ones are reused
+    from it. The result's "versions" maps each endpoint to its
+    Last-Modified-Version, and "incomplete" is True if some group's
+    collections couldn't be fetched (that group is listed as empty).
     """
+    from concurrent.futures import ThreadPoolExecutor
+
+    cached_libraries = {lib["id"]: lib for lib in cached["libraries"]} if cached else {}
+    cached_versions = cached.get("versions", {}) if cached else {}
+
     try:
         libraries: list[dict[str, Any]] = []
+        versions: dict[str, str] = {}
+        incomplete = False
+
+        with ThreadPoolExecutor(max_workers=_MAX_WORKERS) as executor:
+            # Personal library collections and group list are independent
+            personal_endpoint = "/users/0/collections"
+            groups_endpoint = "/users/0/groups"
+            personal_result, groups_result = _get_native_listings(
+                port, [personal_endpoint, groups_endpoint], executor, cached_versions
+            )
+            for result in (personal_result, groups_result):
+                if isinstance(result, Exception):
+                    raise result
+
+            personal_pages, versions[personal_endpoint] = personal_result
+            groups_pages, versions[groups_endpoint] = groups_result
+            if groups_pages is None:
+                groups = [
+                    {"id": lib["id"], "name": lib["name"]}
+                    for lib in cached_libraries.values() if lib.get("type") == "group"
+                ]
+            else:
+                groups = _parse_pages(groups_pages)
 
-        # Get personal library collections
-        personal_collections_resp = requests.get(
-            get_native_url(port, "/users/0/collections"),
-            timeout=10
-        )
-        personal_collections_resp.raise_for_status()
-        personal_collections = personal_collections_resp.json()
+            # Get collections for each group
+            group_endpoints = [f"/groups/{group.get('id')}/collections" for group in groups]
+            group_results = _get_native_listings(port, group_endpoints, executor, cached_versions)
+
+        if personal_pages is None:
+            personal_collections = cached_libraries[1]["collections"]
+        else:
+            personal_collections = _build_collection_tree(_parse_pages(personal_pages))
 
         libraries.append({
             "id": 1,  # Personal library is always ID 1
             "name": "My Library",
             "type": "user",
-            "collections": _build_collection_tree(personal_collections)
+            "collections": personal_collections
         })
 
-        # Get group libraries
-        groups_resp = requests.get(
-            get_native_url(port, "/users/0/groups"),
-            timeout=10
-        )
-        groups_resp.raise_for_status()
-        groups = groups_resp.json()
-
-        # Get collections for each group
-        for group in groups:
+        for group, endpoint, result in zip(groups, group_endpoints, group_results):
             group_id = group.get("id")
-            group_name = group.get("data", {}).get("name") or group.get("name", f"Group {group_id}")
-
-            try:
-                group_collections_resp = requests.get(
-                    get_native_url(port, f"/groups/{group_id}/collections"),
-                    timeout=10
-                )
-                group_collections_resp.raise_for_status()
-                group_collections = group_collections_resp.json()
-            except requests.exceptions.RequestException:
+            if isinstance(result, Exception):
                 group_collections = []
+                incomplete = True
+            else:
+                pages, versions[endpoint] = result
+                if pages is None:
+                    group_collections = cached_libraries[group_id]["collections"]
+                else:
+                    group_collections = _build_collection_tree(_parse_pages(pages))
 
             libraries.append({
                 "id": group_id,
-                "name": group_name,
+                "name": _group_name(group),
                 "type": "group",
-                "collections": _build_collection_tree(group_collections)
+                "collections": group_collections
             })
 
-        return {"libraries": libraries}
+        return {
+            "libraries": libraries,
+            "versions": {k: v for k, v in versions.items() if v},
+            "incomplete": incomplete,
+        }
+
+    except OSError:
+        print(f"Error: Cannot connect to Zotero on port {port}", file=sys.stderr)
+        return None
+    except _HTTPError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return None
+
 
-    except requests.exceptions.ConnectionError:
+def list_collections_raw(port: int) -> bytes | None:
+    """Get all libraries and their flat collection lists as JSON bytes.
+
+    Same layout as list_collections, but "collections" holds the native API
+    response bodies verbatim, so no tree is built and nothing is re-encoded.
+    """
+    from concurrent.futures import ThreadPoolExecutor
+
+    def library_header(library_id: Any, name: str, library_type: str) -> bytes:
+        return (
+            f'{{"id": {json.dumps(library_id)}, "name": {json.dumps(name, ensure_ascii=False)}, '
+            f'"type": {json.dumps(library_type)}, "collections": '
+        ).encode()
+
+    try:
+        with ThreadPoolExecutor(max_workers=_MAX_WORKERS) as executor:
+            personal_result, groups_result = _get_native_listings(
+                port, ["/users/0/collections", "/users/0/groups"], executor
+            )
+            for result in (personal_result, groups_result):
+                if isinstance(result, Exception):
+                    raise result
+            personal_pages, _ = personal_result
+            groups = _parse_pages(groups_result[0])
+
+            group_listings = _get_native_listings(
+                port, [f"/groups/{group.get('id')}/collections" for group in groups], executor
+            )
+
+        parts = [b'{"libraries": [', library_header(1, "My Library", "user"), _join_pages(personal_pages), b"}"]
+        for group, result in zip(groups, group_listings):
+            group_collections = b"[]" if isinstance(result, Exception) else _join_pages(result[0])
+            parts += [b", ", library_header(group.get("id"), _group_name(group), "group"), group_collections, b"}"]
+        parts.append(b"]}")
+
+        return b"".join(parts)
+
+    except OSError:
         print(f"Error: Cannot connect to Zotero on port {port}", file=sys.stderr)
         return None
-    except requests.exceptions.HTTPError as e:
+    except _HTTPError as e:
         print(f"Error: {e}", file=sys.stderr)
         return None
 
 
-def list_collections(port: int) -> dict | None:
+def _zstd() -> Any:
+    """Get the optional zstandard module, or None if it isn't installed."""
+    try:
+        import zstandard
+    except ImportError:
+        return None
+    return zstandard
+
+
+def _cache_path(port: int) -> Path:
+    """Get path of the on-disk collection cache for a Zotero port.
+
+    The file is zstd-compressed when zstandard is installed.
+    """
+    cache_home = os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache"
+    suffix = ".json.zst" if _zstd() else ".json"
+    return Path(cache_home) / "zotero-upload-url" / f"collections-{port}.v{CACHE_FORMAT_VERSION}{suffix}"
+
+
+def _read_cache(port: int) -> tuple[dict, float] | None:
+    """Return cached collection listing and its age in seconds, if present."""
+    zstd = _zstd()
+    path = _cache_path(port)
+    try:
+        age = time.time() - path.stat().st_mtime
+        payload = path.read_bytes()
+        if zstd:
+            payload = zstd.ZstdDecompressor().decompress(payload)
+        return _loads(payload), age
+    except Exception:
+        # Missing, unreadable or corrupt (incl. zstandard.ZstdError); refetch
+        return None
+
+
+def _write_cache(port: int, data: dict) -> None:
+    """Atomically write collection listing to the on-disk cache."""
+    import tempfile
+
+    zstd = _zstd()
+    path = _cache_path(port)
+    payload = orjson.dumps(data) if ORJSON_AVAILABLE else json.dumps(data).encode()
+    if zstd:
+        payload = zstd.ZstdCompressor(level=3).compress(payload)
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with tempfile.NamedTemporaryFile(dir=path.parent, suffix=".tmp", delete=False) as f:
+            f.write(payload)
+        os.replace(f.name, path)
+    except OSError:
+        # Caching is best-effort
+        pass
+
+
+def invalidate_cache(port: int) -> None:
+    """Drop cached collections for a port (e.g. after creating a collection)."""
+    _MEMO.pop(port, None)
+    try:
+        _cache_path(port).unlink()
+    except OSError:
+        pass
+
+
+def list_collections(port: int, use_cache: bool = True) -> dict | None:
     """Get hierarchical list of all libraries and collections.
 
-    Uses native Zotero API (no plugin required).
+    Uses native Zotero API (no plugin required). Results are cached in memory
+    and on disk for CACHE_TTL_SECONDS; after that the disk cache is
+    revalidated using Zotero's library versions, so unchanged listings aren't
+    downloaded again. Listings where a group couldn't be fetched aren't
+    cached. Pass use_cache=False to force a fresh fetch.
+
+    The returned dict may be shared between calls and must not be modified.
     """
-    return list_collections_native(port)
+    stale = None
+    if use_cache:
+        memo = _MEMO.get(port)
+        if memo is not None and time.monotonic() < memo[0]:
+            return memo[1]
+
+        cached = _read_cache(port)
+        if cached is not None:
+            cached_data, age = cached
+            if age <= CACHE_TTL_SECONDS:
+                data = _libraries_from_json(cached_data)
+                _MEMO[port] = (time.monotonic() + CACHE_TTL_SECONDS - age, data)
+                return data
+            stale = {**_libraries_from_json(cached_data), "versions": cached_data.get("versions", {})}
+
+    data = list_collections_native(port, cached=stale)
+    # Don't cache a listing with failed groups, so the next call retries them
+    if data is not None and not data["incomplete"]:
+        _write_cache(port, {**_libraries_to_json(data), "versions": data.get("versions", {})})
+        _MEMO[port] = (time.monotonic() + CACHE_TTL_SECONDS, data)
+    return data
 
 
 def select_collection(port: int, library_id: int, collection_key: str | None) -> dict | None:
@@ -175,17 +625,12 @@ def select_collection(port: int, library_id: int, collection_key: str | None) ->
     Uses plugin API (requires zotero-export-notes plugin).
     """
     try:
-        r = requests.post(
-            get_plugin_url(port, "/collection/select"),
-            json={"libraryID": library_id, "collectionKey": collection_key},
-            timeout=5
-        )
-        r.raise_for_status()
-        return r.json()
-    except requests.exceptions.ConnectionError:
+        r = _post_plugin(port, "/collection/select", {"libraryID": library_id, "collectionKey": collection_key})
+        return _loads(r.content)
+    except OSError:
         print(f"Error: Cannot connect to Zotero on port {port}", file=sys.stderr)
         return None
-    except requests.exceptions.HTTPError as e:
+    except _HTTPError as e:
         print(f"Error: {e}", file=sys.stderr)
         return None
 
@@ -205,41 +650,69 @@ def create_collection(port: int, library_id: int, name: str, parent_key: str | N
         payload = {"libraryID": library_id, "name": name}
         if parent_key:
             payload["parentKey"] = parent_key
-        r = requests.post(
-            get_plugin_url(port, "/collection/create"),
-            json=payload,
-            timeout=5
-        )
-        r.raise_for_status()
-        return r.json()
-    except requests.exceptions.ConnectionError:
+        r = _post_plugin(port, "/collection/create", payload)
+        invalidate_cache(port)
+        return _loads(r.content)
+    except OSError:
         print(f"Error: Cannot connect to Zotero on port {port}", file=sys.stderr)
         return None
-    except requests.exceptions.HTTPError as e:
+    except _HTTPError as e:
         print(f"Error: {e}", file=sys.stderr)
         return None
 
 
-def print_tree(collections: list, prefix: str = "", start_idx: int = 1) -> tuple[list, int]:
+def _write_json(obj: Any) -> None:
+    """Write obj to stdout as indented JSON."""
+    sys.stdout.flush()
+    sys.stdout.buffer.write(_dumps(obj) + b"\n")
+
+
+@functools.lru_cache(maxsize=4096)
+def _tree_prefix(base: str, path_bits: int, depth: int) -> str:
+    """Get the tree-drawing prefix for a node at depth.
+
+    Bit i of path_bits is set if the ancestor at depth i is the last of its
+    siblings. Prefixes are cached, so nodes with the same ancestry shape
+    share one string.
+    """
+    return base + "".join("    " if (path_bits >> i) & 1 else "│   " for i in range(depth))
+
+
+def print_tree(
+    collections: list, prefix: str = "", start_idx: int = 1, out: list[str] | None = None
+) -> tuple[list, int]:
     """Print collection tree and return flat list for selection.
 
+    If out is given, lines are appended to it instead of being written to
+    stdout, so callers can emit a whole menu with a single write.
+
     Returns (items, next_idx) where items is flat list and next_idx is the next available index.
     """
     items = []
+    lines = out if out is not None else []
     idx = start_idx
 
-    for i, c in enumerate(collections):
-        is_last = i == len(collections) - 1
+    # Iterative pre-order walk; stack holds (node, depth, path_bits, is_last)
+    # where bit i of path_bits is set if the ancestor at depth i is a last child
+    last = len(collections) - 1
+    stack = [(collections[i], 0, 0, i == last) for i in range(last, -1, -1)]
+    while stack:
+        c, depth, path_bits, is_last = stack.pop()
         branch = "└── " if is_last else "├── "
-        child_prefix = "    " if is_last else "│   "
 
         items.append(c)
-        print(f"{prefix}{branch}[{idx}] {c['name']}")
+        lines.append(f"{_tree_prefix(prefix, path_bits, depth)}{branch}[{idx}] {c.name}")
         idx += 1
 
-        if c.get("children"):
-            child_items, idx = print_tree(c["children"], prefix + child_prefix, idx)
-            items.extend(child_items)
+        children = c.children
+        if children:
+            child_depth = depth + 1
+            child_bits = path_bits | (is_last << depth)
+            last = len(children) - 1
+            stack.extend((children[i], child_depth, child_bits, i == last) for i in range(last, -1, -1))
+
+    if out is None and lines:
+        sys.stdout.write("\n".join(lines) + "\n")
 
     return items, idx
 
@@ -247,55 +720,89 @@ def print_tree(collections: list, prefix: str = "", start_idx: int = 1) -> tuple
 def build_flat_list(libraries: list) -> list:
     """Build flat list of all selectable items from library data."""
     all_items = []
-
-    def add_collections(collections: list, lib_id: int, lib_name: str, depth: int = 0):
-        for c in collections:
-            indent = "  " * depth
-            all_items.append({
-                "type": "collection",
-                "id": lib_id,
-                "name": c["name"],
-                "key": c["key"],
-                "display": f"{lib_name} > {indent}{c['name']}"
-            })
-            if c.get("children"):
-                add_collections(c["children"], lib_id, lib_name, depth + 1)
+    append = all_items.append
 
     for lib in libraries:
+        lib_id = lib["id"]
+        lib_name = lib["name"]
         # Add library root
-        all_items.append({
+        append({
             "type": "library",
-            "id": lib["id"],
-            "name": lib["name"],
+            "id": lib_id,
+            "name": lib_name,
             "key": None,
-            "display": f"{lib['name']} (root)"
+            "display": f"{lib_name} (root)"
         })
-        # Add collections
-        if lib.get("collections"):
-            add_collections(lib["collections"], lib["id"], lib["name"])
+
+        # Add collections (iterative pre-order walk; stack holds (node, display
+        # prefix)). Each prefix is built once per parent and shared by its
+        # children, so no per-node formatting or indent multiplication.
+        root_prefix = f"{lib_name} > "
+        stack = [(c, root_prefix) for c in reversed(lib.get("collections") or [])]
+        pop = stack.pop
+        while stack:
+            c, prefix = pop()
+            name = c.name
+            append({
+                "type": "collection",
+                "id": lib_id,
+                "name": name,
+                "key": c.key,
+                "display": prefix + name
+            })
+            children = c.children
+            if children:
+                child_prefix = prefix + "  "
+                stack.extend((child, child_prefix) for child in reversed(children))
 
     return all_items
 
 
 def fuzzy_select(items: list) -> dict | None:
     """Use fzf for fuzzy selection if available."""
+    import shutil
+    import subprocess
+
     fzf_path = shutil.which("fzf")
     if not fzf_path:
         return None
 
-    # Build input for fzf: "index:display_name"
-    fzf_input = "\n".join(f"{i}:{item['display']}" for i, item in enumerate(items))
-
     try:
-        result = subprocess.run(
+        proc = subprocess.Popen(
             [fzf_path, "--height=40%", "--reverse", "--prompt=Collection> ",
              "--with-nth=2..", "--delimiter=:"],
-            input=fzf_input,
-            capture_output=True,
-            text=True
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL
         )
-        if result.returncode == 0 and result.stdout.strip():
-            idx = int(result.stdout.strip().split(":")[0])
+    except OSError:
+        return None
+
+    # Stream input for fzf ("index:display_name") from a background thread
+    # so fzf can start matching before the whole list has been written
+    def feed() -> None:
+        try:
+            for i, item in enumerate(items):
+                proc.stdin.write(f"{i}:{item['display']}\n".encode())
+        except OSError:
+            # fzf exited (selection made or cancelled) before reading everything
+            pass
+        finally:
+            try:
+                proc.stdin.close()
+            except OSError:
+                pass
+
+    writer = threading.Thread(target=feed, daemon=True)
+    writer.start()
+
+    try:
+        # Only the selected "index:..." line matters; parse the index from bytes
+        with proc.stdout:
+            line = proc.stdout.readline()
+        returncode = proc.wait()
+        if returncode == 0 and line.strip():
+            idx = int(line.split(b":", 1)[0])
             return items[idx]
     except Exception:
         pass
@@ -306,15 +813,18 @@ def fuzzy_select(items: list) -> dict | None:
 def numbered_select(items: list, libraries: list) -> dict | None:
     """Fallback numbered selection when fzf is not available."""
     next_idx = 1
+    lines: list[str] = []
 
     for lib in libraries:
-        print(f"[{next_idx}] {lib['name']} (Library root)")
+        lines.append(f"[{next_idx}] {lib['name']} (Library root)")
         next_idx += 1
 
         if lib.get("collections"):
-            _, next_idx = print_tree(lib["collections"], prefix="    ", start_idx=next_idx)
+            _, next_idx = print_tree(lib["collections"], prefix="    ", start_idx=next_idx, out=lines)
+
+        lines.append("")
 
-        print()
+    sys.stdout.write("\n".join(lines) + "\n")
 
     try:
         choice = input("Select number (or 'q' to quit): ").strip()
@@ -332,9 +842,9 @@ def numbered_select(items: list, libraries: list) -> dict | None:
         return None
 
 
-def interactive_select(port: int, use_fzf: bool = True) -> bool:
+def interactive_select(port: int, use_fzf: bool = True, use_cache: bool = True) -> bool:
     """Interactive collection selection."""
-    data = list_collections(port)
+    data = list_collections(port, use_cache=use_cache)
     if not data:
         return False
 
@@ -384,6 +894,7 @@ Examples:
   %(prog)s --current                # Show current selection
   %(prog)s --list                   # List all collections (JSON)
   %(prog)s --list --tree            # List as tree
+  %(prog)s --list --raw             # Flat collection lists as returned by Zotero (JSON)
   %(prog)s --library 1 --select KEY # Select specific collection
   %(prog)s --library 1              # Select library root
   %(prog)s --library 1 --create "New Collection"  # Create collection
@@ -412,6 +923,11 @@ Examples:
         action="store_true",
         help="Display list as tree (with --list)"
     )
+    parser.add_argument(
+        "--raw",
+        action="store_true",
+        help="Output Zotero's flat collection lists as-is (with --list)"
+    )
     parser.add_argument(
         "--library",
         type=int,
@@ -443,15 +959,22 @@ Examples:
         action="store_true",
         help="Use numbered list instead of fuzzy finder"
     )
+    parser.add_argument(
+        "--refresh", "--no-cache",
+        action="store_true",
+        help=f"Ignore cached collection list (cached for {CACHE_TTL_SECONDS}s)"
+    )
 
     args = parser.parse_args()
+    if args.raw and not args.list:
+        parser.error("--raw requires --list")
 
     # Show current selection
     if args.current:
         data = get_current_collection(args.port)
         if data:
             if args.json:
-                print(json.dumps(data, indent=2))
+                _write_json(data)
             else:
                 lib_name = data.get("libraryName", "Unknown")
                 coll = data.get("collection")
@@ -464,17 +987,26 @@ Examples:
         return 0 if data else 1
 
     # List all collections
+    if args.list and args.raw:
+        raw = list_collections_raw(args.port)
+        if raw:
+            sys.stdout.flush()
+            sys.stdout.buffer.write(raw + b"\n")
+        return 0 if raw else 1
+
     if args.list:
-        data = list_collections(args.port)
+        data = list_collections(args.port, use_cache=not args.refresh)
         if data:
             if args.json or not args.tree:
-                print(json.dumps(data, indent=2))
+                _write_json(_libraries_to_json(data))
             else:
+                lines: list[str] = []
                 for lib in data.get("libraries", []):
-                    print(f"{lib['name']} (Library ID: {lib['id']})")
+                    lines.append(f"{lib['name']} (Library ID: {lib['id']})")
                     if lib.get("collections"):
-                        print_tree(lib["collections"], prefix="  ")  # ignore return
-                    print()
+                        print_tree(lib["collections"], prefix="  ", out=lines)  # ignore return
+                    lines.append("")
+                sys.stdout.write("\n".join(lines) + "\n")
         return 0 if data else 1
 
     # Create collection
@@ -485,7 +1017,7 @@ Examples:
         result = create_collection(args.port, args.library, args.create, args.parent)
         if result:
             if args.json:
-                print(json.dumps(result, indent=2))
+                _write_json(result)
             elif result.get("success"):
                 coll = result.get("collection", {})
                 print(f"Created: {coll.get('name')} (Key: {coll.get('key')})")
@@ -501,7 +1033,7 @@ Examples:
         result = select_collection(args.port, args.library, args.select)
         if result:
             if args.json:
-                print(json.dumps(result, indent=2))
+                _write_json(result)
             elif result.get("success"):
                 sel = result.get("selected", {})
                 if sel.get("collectionKey"):
@@ -514,7 +1046,7 @@ Examples:
         return 0 if result and result.get("success") else 1
 
     # Interactive selection (default)
-    success = interactive_select(args.port, use_fzf=not args.no_fzf)
+    success = interactive_select(args.port, use_fzf=not args.no_fzf, use_cache=not args.refresh)
     return 0 if success else 1
 
 
@@ -11,39 +11,160 @@ Usage:
 """
 
 import argparse
+import atexit
+import json
+import selectors
+import string
 import subprocess
 import sys
 import time
-
-# Optional: for Zotero ping check
-try:
-    import requests
-    REQUESTS_AVAILABLE = True
-except ImportError:
-    REQUESTS_AVAILABLE = False
+import types
 
 DEFAULT_ZOTERO_PORT = 23119
 
 
 def check_zotero_running(port: int = DEFAULT_ZOTERO_PORT) -> bool:
     """Check if Zotero desktop is running via connector ping."""
-    if not REQUESTS_AVAILABLE:
-        # Can't check, assume it's running
-        return True
+    import socket
+
     try:
-        r = requests.get(
-            f"http://127.0.0.1:{port}/connector/ping",
-            timeout=2
-        )
-        return r.status_code == 200
-    except Exception:
+        with socket.create_connection(("127.0.0.1", port), timeout=0.3) as s:
+            # Loopback connects are instant or refused; allow longer to answer
+            s.settimeout(1.0)
+            # Send a loopback Host header like an HTTP client would
+            s.sendall(f"GET /connector/ping HTTP/1.0\r\nHost: 127.0.0.1:{port}\r\n\r\n".encode())
+            status_line = s.recv(64).split(b"\r\n", 1)[0]
+        return status_line.split()[1:2] == [b"200"]
+    except OSError:
         return False
 
 
+# JavaScript for Automation host run by the persistent osascript process.
+# Reads one JSON-encoded AppleScript source per line from stdin, runs it with
+# NSAppleScript and writes a JSON reply line ({ok, result} or {ok, error}).
+_OSA_HOST = r"""
+ObjC.import("Foundation");
+const input = $.NSFileHandle.fileHandleWithStandardInput;
+const output = $.NSFileHandle.fileHandleWithStandardOutput;
+let buffer = "";
+for (;;) {
+    const data = input.availableData;
+    if (data.length === 0) break;
+    buffer += $.NSString.alloc.initWithDataEncoding(data, $.NSUTF8StringEncoding).js;
+    let newline;
+    while ((newline = buffer.indexOf("\n")) >= 0) {
+        const source = JSON.parse(buffer.slice(0, newline));
+        buffer = buffer.slice(newline + 1);
+        const error = Ref();
+        const result = $.NSAppleScript.alloc.initWithSource(source).executeAndReturnError(error);
+        const reply = (!result || result.isNil())
+            ? {ok: false, error: ObjC.deepUnwrap(error[0]).NSAppleScriptErrorMessage}
+            : {ok: true, result: ObjC.unwrap(result.stringValue) || ""};
+        output.writeData($(JSON.stringify(reply) + "\n").dataUsingEncoding($.NSUTF8StringEncoding));
+    }
+}
+"""
+
+
+class _OsaReplyError(RuntimeError):
+    """The coprocess was sent a script but gave no usable reply."""
+
+
+class _OsaProc:
+    """Long-lived osascript child process that runs AppleScript on request.
+
+    Each osascript launch costs hundreds of milliseconds, so one process is
+    started on first use and every script is streamed to it over stdin.
+    """
+
+    _instance: "_OsaProc | None" = None
+    _atexit_registered = False
+
+    def __init__(self):
+        self.proc = subprocess.Popen(
+            ["osascript", "-l", "JavaScript", "-e", _OSA_HOST],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            text=True,
+            encoding="utf-8",
+            bufsize=1
+        )
+
+    @classmethod
+    def instance(cls) -> "_OsaProc":
+        """Get the running coprocess, starting it if needed."""
+        if cls._instance is None or cls._instance.proc.poll() is not None:
+            if not cls._atexit_registered:
+                atexit.register(cls.shutdown)
+                cls._atexit_registered = True
+            cls._instance = cls()
+        return cls._instance
+
+    @classmethod
+    def shutdown(cls):
+        """Close stdin so the coprocess exits, and wait for it."""
+        osa, cls._instance = cls._instance, None
+        if osa is None:
+            return
+        try:
+            osa.proc.stdin.close()
+            osa.proc.wait(timeout=2)
+        except (OSError, subprocess.TimeoutExpired):
+            osa.proc.kill()
+
+    def exec(self, script: str) -> str:
+        """Run one AppleScript and return its result as a string.
+
+        Raises OSError if the script could not be sent to the coprocess, and
+        RuntimeError if it fails or no usable reply comes back after sending
+        (it may already have run, so it must not be retried).
+        """
+        try:
+            self.proc.stdin.write(json.dumps(script) + "\n")
+            self.proc.stdin.flush()
+        except ValueError as e:
+            # stdin already closed
+            raise OSError(str(e)) from e
+        try:
+            line = self.proc.stdout.readline()
+            if not line:
+                raise _OsaReplyError("osascript coprocess exited mid-script")
+            reply = json.loads(line)
+        except (OSError, ValueError) as e:
+            raise _OsaReplyError(f"osascript coprocess failed: {e}") from e
+        if not reply.get("ok"):
+            raise RuntimeError(f"AppleScript error: {reply.get('error')}")
+        return reply.get("result", "").strip()
+
+
 def run_applescript(script: str) -> str:
-    """Execute AppleScript and return output."""
+    """Execute AppleScript and return output.
+
+    Uses the persistent osascript coprocess, falling back to a one-shot
+    osascript run if the script couldn't be delivered to it.
+    """
+    try:
+        osa = _OsaProc.instance()
+    except OSError:
+        return _run_applescript_once(script)
+    try:
+        return osa.exec(script)
+    except OSError:
+        _OsaProc.shutdown()
+        return _run_applescript_once(script)
+    except _OsaReplyError:
+        # The script may already have run, so don't retry it; just drop the
+        # coprocess so the next call starts a fresh one.
+        _OsaProc.shutdown()
+        raise
+
+
+def _run_applescript_once(script: str) -> str:
+    """Execute AppleScript in a fresh osascript process and return output."""
     result = subprocess.run(
-        ["osascript", "-e", script],
+        ["osascript", "-"],
+        input=script,
         capture_output=True,
         text=True
     )
@@ -52,24 +173,79 @@ def run_applescript(script: str) -> str:
     return result.stdout.strip()
 
 
+def _applescript_string(value: str) -> str:
+    """Quote a Python string as an AppleScript string literal."""
+    escaped = value.replace("\\", "\\\\").replace('"', '\\"')
+    return f'"{escaped}"'
+
+
+# AppleScript templates, compiled once; $-placeholders leave AppleScript's
+# {...} record/list syntax untouched.
+_OPEN_URL_TMPL = string.Template('''
+    tell application "Firefox"
+        activate
+        open location $url
+    end tell
+''')
+
+_KEYSTROKE_TMPL = string.Template('''
+    tell application "Firefox" to activate
+    repeat 20 times
+        if frontmost of application "Firefox" then exit repeat
+        delay 0.025
+    end repeat
+    tell application "System Events"
+        keystroke "$key" using {$mods}
+    end tell
+''')
+
+_COMBINED_TMPL = string.Template('''
+$open
+    delay $delay
+$save
+''')
+
+
+def _open_script(url: str) -> str:
+    """Build AppleScript that opens url in Firefox and brings it forward."""
+    return _OPEN_URL_TMPL.substitute(url=_applescript_string(url))
+
+
 def open_url_in_firefox(url: str):
     """Open URL in Firefox (new tab if already running)."""
-    # Use subprocess to open URL in Firefox
-    result = subprocess.run(
-        ["open", "-a", "Firefox", url],
-        capture_output=True,
-        text=True
-    )
-    if result.returncode != 0:
-        raise RuntimeError(f"Error opening URL: {result.stderr}")
+    run_applescript(_open_script(url))
+
+
+_MODIFIER_MAP = types.MappingProxyType({
+    "cmd": "command down",
+    "command": "command down",
+    "shift": "shift down",
+    "ctrl": "control down",
+    "control": "control down",
+    "alt": "option down",
+    "option": "option down",
+})
+
+# Parsed shortcuts, keyed by the shortcut string as given
+_SHORTCUT_CACHE: dict[str, tuple[str, str]] = {}
+
+
+def _parse_shortcut(shortcut: str) -> tuple[str, str]:
+    """Parse a shortcut like "cmd+shift+s" into (key, AppleScript modifiers)."""
+    cached = _SHORTCUT_CACHE.get(shortcut)
+    if cached is not None:
+        return cached
 
-    # Give Firefox time to open the tab, then activate it
-    import time
-    time.sleep(0.5)
+    *modifiers, key = shortcut.lower().split("+")
+    modifiers_str = ", ".join([_MODIFIER_MAP.get(m, m) for m in modifiers])
+    _SHORTCUT_CACHE[shortcut] = parsed = (key, modifiers_str)
+    return parsed
 
-    # Activate Firefox
-    activate_script = 'tell application "Firefox" to activate'
-    run_applescript(activate_script)
+
+def _save_script(shortcut: str) -> str:
+    """Build AppleScript that focuses Firefox and sends the save shortcut."""
+    key, modifiers_str = _parse_shortcut(shortcut)
+    return _KEYSTROKE_TMPL.substitute(key=key, mods=modifiers_str)
 
 
 def trigger_zotero_save(shortcut: str = "cmd+shift+z"):
@@ -78,34 +254,28 @@ def trigger_zotero_save(shortcut: str = "cmd+shift+z"):
     Args:
         shortcut: Keyboard shortcut like "cmd+shift+s" or "ctrl+shift+z"
     """
-    # Parse shortcut string into AppleScript modifiers
-    parts = shortcut.lower().split("+")
-    key = parts[-1]
-    modifiers = parts[:-1]
-
-    modifier_map = {
-        "cmd": "command down",
-        "command": "command down",
-        "shift": "shift down",
-        "ctrl": "control down",
-        "control": "control down",
-        "alt": "option down",
-        "option": "option down",
-    }
+    run_applescript(_save_script(shortcut))
 
-    applescript_modifiers = [modifier_map.get(m, m) for m in modifiers]
-    modifiers_str = ", ".join(applescript_modifiers)
 
-    script = f'''
-    tell application "Firefox"
-        activate
-    end tell
-    delay 0.5
-    tell application "System Events"
-        keystroke "{key}" using {{{modifiers_str}}}
-    end tell
-    '''
-    run_applescript(script)
+def run_combined(url: str, delay_seconds: float, shortcut: str):
+    """Open URL, wait, then trigger the Zotero save in one AppleScript run.
+
+    Equivalent to open_url_in_firefox + a delay + trigger_zotero_save, but
+    submitted as a single script for non-interactive (--auto) saves.
+    """
+    run_applescript(_COMBINED_TMPL.substitute(
+        open=_open_script(url),
+        delay=delay_seconds,
+        save=_save_script(shortcut),
+    ))
+
+
+def _wait_for_enter(timeout: float):
+    """Wait up to timeout seconds, returning early if Enter is pressed."""
+    with selectors.DefaultSelector() as sel:
+        sel.register(sys.stdin, selectors.EVENT_READ)
+        if sel.select(timeout=timeout):
+            sys.stdin.readline()
 
 
 def main():
@@ -165,12 +335,24 @@ Prerequisites:
 
     args = parser.parse_args()
 
-    # Check prerequisites
+    # Check prerequisites before touching Firefox
     if not args.skip_check and not check_zotero_running(args.port):
         print(f"Error: Zotero is not running on port {args.port}. Please start Zotero first.")
         print("(Use --skip-check to bypass this check, or --port to specify a different port)")
         sys.exit(1)
 
+    # Open, wait and save in a single AppleScript run (no one to press Enter)
+    if args.auto and not args.no_open and not sys.stdin.isatty():
+        print(f"Opening: {args.url}")
+        print(f"Waiting {args.auto} seconds for page to load, then triggering Zotero save ({args.shortcut})...")
+        try:
+            run_combined(args.url, args.auto, args.shortcut)
+        except RuntimeError as e:
+            print(f"Error saving: {e}")
+            sys.exit(1)
+        print("Done! Check Zotero for the saved item.")
+        return
+
     # Open URL in Firefox
     if not args.no_open:
         print(f"Opening: {args.url}")
@@ -182,8 +364,12 @@ Prerequisites:
 
     # Wait for auth/page load
     if args.auto:
-        print(f"Waiting {args.auto} seconds for page to load...")
-        time.sleep(args.auto)
+        if sys.stdin.isatty():
+            print(f"Waiting {args.auto} seconds for page to load (press Enter to save now)...")
+            _wait_for_enter(args.auto)
+        else:
+            print(f"Waiting {args.auto} seconds for page to load...")
+            time.sleep(args.auto)
     else:
         try:
             if sys.stdin.isatty():